@@ -1,3 +1,4 @@
+import bisect
 import dataclasses
 import typing
 
@@ -11,38 +12,63 @@ def yield_data(filename: str) -> typing.Iterator[str]:
             yield line.strip()
 
 
+class DistanceModel(typing.Protocol):
+    def __call__(self, race_time: int, hold_time: int) -> int: ...
+
+
+def linear_acceleration_distance(race_time: int, hold_time: int) -> int:
+    return (race_time - hold_time) * hold_time
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class CappedSpeedDistance:
+    max_speed: int
+
+    def __call__(self, race_time: int, hold_time: int) -> int:
+        return (race_time - hold_time) * min(hold_time, self.max_speed)
+
+
 @dataclasses.dataclass
 class Race:
     time: int = 0
     record_distance: int = 0
+    distance_model: DistanceModel = linear_acceleration_distance
 
     def calculate_distance(self, hold_time: int) -> int:
         if hold_time >= self.time or hold_time <= 0:
             return 0
-        return (self.time - hold_time) * hold_time
+        return self.distance_model(self.time, hold_time)
 
     def is_distance_new_record(self, distance: int) -> bool:
         return distance > self.record_distance
 
-    def number_of_ways_to_beat_record(self) -> int:
-        number_of_ways = 0
-        middle = self.time // 2
-        # print(middle)
-        for time in range(middle, 0, -1):
-            new_distance = self.calculate_distance(time)
-            if self.is_distance_new_record(new_distance):
-                number_of_ways += 1
+    def peak_hold_time(self) -> int:
+        # distance_model must be unimodal in hold_time, the first maximum is found
+        low, high = 0, self.time
+        while low < high:
+            middle = (low + high) // 2
+            if self.calculate_distance(middle) < self.calculate_distance(middle + 1):
+                low = middle + 1
             else:
-                break
+                high = middle
+        return low
+
+    def winning_hold_times(self) -> range:
+        peak = self.peak_hold_time()
+        if not self.is_distance_new_record(self.calculate_distance(peak)):
+            return range(0)
+        first = bisect.bisect_right(
+            range(peak + 1), self.record_distance, key=self.calculate_distance
+        )
+        last = peak + bisect.bisect_left(
+            range(peak, self.time + 1),
+            -self.record_distance,
+            key=lambda hold_time: -self.calculate_distance(hold_time),
+        )
+        return range(first, last)
 
-        for time in range(middle + 1, self.time + 1):
-            new_distance = self.calculate_distance(time)
-            if self.is_distance_new_record(new_distance):
-                number_of_ways += 1
-            else:
-                break
-
-        return number_of_ways
+    def number_of_ways_to_beat_record(self) -> int:
+        return len(self.winning_hold_times())
 
 
 def create_races(data: typing.Iterator) -> list[Race]:
@@ -1,8 +1,13 @@
 import collections
 import dataclasses
 import enum
+import heapq
 import itertools
 import operator
+import random
+import struct
+import tempfile
+import time
 import typing
 
 TEST_FILENAME = "day7_testdata.txt"
@@ -42,6 +47,13 @@ class HandType(enum.Enum):
     FIVE_OF_A_KIND = 7
 
 
+CARD_KEY_BITS = 4
+HAND_KEY_BITS = CARD_KEY_BITS * 6
+RADIX_BITS = 12
+RADIX_MASK = (1 << RADIX_BITS) - 1
+RUN_RECORD = struct.Struct("<II")
+RUN_READ_RECORDS = 4096
+
 string_to_card_type = {
     "2": CardType.TWO,
     "3": CardType.THREE,
@@ -59,6 +71,44 @@ string_to_card_type = {
 }
 
 
+HAND_SIZE = 5
+
+signature_to_hand_type = {
+    (5,): HandType.FIVE_OF_A_KIND,
+    (4, 1): HandType.FOUR_OF_A_KIND,
+    (3, 2): HandType.FULL_HOUSE,
+    (3, 1, 1): HandType.THREE_OF_A_KIND,
+    (2, 2, 1): HandType.TWO_PAIR,
+    (2, 1, 1, 1): HandType.ONE_PAIR,
+    (1, 1, 1, 1, 1): HandType.HIGH_CARD,
+}
+
+
+def yield_signatures(total: int, largest: int) -> typing.Iterator[tuple[int, ...]]:
+    if total == 0:
+        yield ()
+        return
+    for first in range(min(total, largest), 0, -1):
+        for rest in yield_signatures(total - first, first):
+            yield (first, *rest)
+
+
+def create_hand_type_table() -> dict[tuple[tuple[int, ...], int], HandType]:
+    table: dict[tuple[tuple[int, ...], int], HandType] = {}
+    for wild_count in range(HAND_SIZE + 1):
+        for signature in yield_signatures(HAND_SIZE - wild_count, HAND_SIZE):
+            # wild cards are always best spent joining the largest group
+            if signature:
+                best = (signature[0] + wild_count, *signature[1:])
+            else:
+                best = (wild_count,)
+            table[signature, wild_count] = signature_to_hand_type[best]
+    return table
+
+
+hand_type_table = create_hand_type_table()
+
+
 @dataclasses.dataclass
 class Card:
     card_type: CardType
@@ -73,103 +123,68 @@ class Hand:
     cards: list[Card] = dataclasses.field(default_factory=list)
     bid: int = 0
     jokers: bool = False
+    key: int = dataclasses.field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        key = self.type().value
+        for card in self.cards:
+            key = key << CARD_KEY_BITS | card.card_type.value
+        self.key = key
 
     def type(self) -> HandType:
-        counter: collections.Counter = collections.Counter(
-            "".join(card.string for card in self.cards)
-        )
-        match sorted(counter.items(), reverse=True, key=operator.itemgetter(1)):
-            case [(_, 5)]:
-                return HandType.FIVE_OF_A_KIND
-
-            case [(_, 4), (_, 1)]:
-                if all((self.jokers, counter["J"] == 1)):
-                    return HandType.FIVE_OF_A_KIND
-                if all((self.jokers, counter["J"] == 4)):
-                    return HandType.FIVE_OF_A_KIND
-                return HandType.FOUR_OF_A_KIND
-
-            case [(_, 3), (_, 2)]:
-                if all((self.jokers, counter["J"] == 2)):
-                    return HandType.FIVE_OF_A_KIND
-                if all((self.jokers, counter["J"] == 3)):
-                    return HandType.FIVE_OF_A_KIND
-                return HandType.FULL_HOUSE
-
-            case [(_, 3), (_, 1), (_, 1)]:
-                if all((self.jokers, counter["J"] == 1)):
-                    return HandType.FOUR_OF_A_KIND
-                if all((self.jokers, counter["J"] == 3)):
-                    return HandType.FOUR_OF_A_KIND
-                return HandType.THREE_OF_A_KIND
-
-            case [(_, 2), (_, 2), (_, 1)]:
-                if all((self.jokers, counter["J"] == 1)):
-                    return HandType.FULL_HOUSE
-                if all((self.jokers, counter["J"] == 2)):
-                    return HandType.FOUR_OF_A_KIND
-                return HandType.TWO_PAIR
-
-            case [(_, 2), (_, 1), (_, 1), (_, 1)]:
-                if all((self.jokers, counter["J"] == 1)):
-                    return HandType.THREE_OF_A_KIND
-                if all((self.jokers, counter["J"] == 2)):  # J25J4 T4JJ3
-                    return HandType.THREE_OF_A_KIND
-                return HandType.ONE_PAIR
-
-            case _:
-                if all((self.jokers, counter["J"] == 1)):
-                    return HandType.ONE_PAIR
-                return HandType.HIGH_CARD
+        counter = collections.Counter(card.card_type for card in self.cards)
+        wild_count = counter.pop(CardType.JOKER, 0)
+        signature = tuple(sorted(counter.values(), reverse=True))
+        # like the old catch-all case, hands outside the table are a high card
+        return hand_type_table.get((signature, wild_count), HandType.HIGH_CARD)
 
     def __lt__(self, other: "Hand") -> bool:
-        for card, othercard in zip(self.cards, other.cards):
-            if card == othercard:
-                continue
-            return card < othercard
-
-        print("Shouldn't get here so returning false")
-        return False
+        return self.key < other.key
 
     def __str__(self) -> str:
         return f"{" ".join(card.string for card in self.cards)} {self.bid}"
 
 
 @dataclasses.dataclass
-class HandTypeCollection:
-    five_of_a_kind: list[Hand] = dataclasses.field(default_factory=list)
-    four_of_a_kind: list[Hand] = dataclasses.field(default_factory=list)
-    full_house: list[Hand] = dataclasses.field(default_factory=list)
-    three_of_a_kind: list[Hand] = dataclasses.field(default_factory=list)
-    two_pair: list[Hand] = dataclasses.field(default_factory=list)
-    one_pair: list[Hand] = dataclasses.field(default_factory=list)
-    high_card: list[Hand] = dataclasses.field(default_factory=list)
-
-    def add_hand(self, hand: Hand) -> None:
-        match hand.type():
-            case HandType.FIVE_OF_A_KIND:
-                self.five_of_a_kind.append(hand)
-            case HandType.FOUR_OF_A_KIND:
-                self.four_of_a_kind.append(hand)
-            case HandType.FULL_HOUSE:
-                self.full_house.append(hand)
-            case HandType.THREE_OF_A_KIND:
-                self.three_of_a_kind.append(hand)
-            case HandType.TWO_PAIR:
-                self.two_pair.append(hand)
-            case HandType.ONE_PAIR:
-                self.one_pair.append(hand)
-            case HandType.HIGH_CARD:
-                self.high_card.append(hand)
-
-    def sort_collections(self) -> None:
-        self.five_of_a_kind.sort()
-        self.four_of_a_kind.sort()
-        self.full_house.sort()
-        self.three_of_a_kind.sort()
-        self.two_pair.sort()
-        self.one_pair.sort()
-        self.high_card.sort()
+class FenwickTree:
+    size: int
+    tree: dict[int, int] = dataclasses.field(default_factory=dict)
+
+    def add(self, index: int, amount: int) -> None:
+        index += 1
+        while index <= self.size:
+            self.tree[index] = self.tree.get(index, 0) + amount
+            index += index & -index
+
+    def prefix_sum(self, index: int) -> int:
+        index += 1
+        total = 0
+        while index > 0:
+            total += self.tree.get(index, 0)
+            index -= index & -index
+        return total
+
+
+@dataclasses.dataclass
+class RankedHands:
+    counts: FenwickTree = dataclasses.field(
+        default_factory=lambda: FenwickTree(1 << HAND_KEY_BITS)
+    )
+    bids: FenwickTree = dataclasses.field(
+        default_factory=lambda: FenwickTree(1 << HAND_KEY_BITS)
+    )
+    total_bid: int = 0
+    total_winnings: int = 0
+
+    def add_hand(self, hand: Hand) -> int:
+        # equal keys rank in insertion order, each higher hand moves up one rank
+        rank = self.counts.prefix_sum(hand.key) + 1
+        self.total_winnings += self.total_bid - self.bids.prefix_sum(hand.key)
+        self.total_winnings += rank * hand.bid
+        self.counts.add(hand.key, 1)
+        self.bids.add(hand.key, hand.bid)
+        self.total_bid += hand.bid
+        return self.total_winnings
 
 
 def create_card(card_str: str, jokers: bool = False) -> Card:
@@ -190,54 +205,96 @@ def create_hands(data: typing.Iterator, jokers: bool = False) -> list[Hand]:
     return hands
 
 
+def yield_hand_records(
+    data: typing.Iterator, jokers: bool = False
+) -> typing.Iterator[tuple[int, int]]:
+    for line in data:
+        cards_str, bid_str = line.split(" ")
+        cards = [create_card(card_str, jokers) for card_str in cards_str]
+        hand = Hand(cards, int(bid_str), jokers)
+        yield hand.key, hand.bid
+
+
+def write_run(records: list[tuple[int, int]], directory: str) -> str:
+    records.sort(key=operator.itemgetter(0))
+    with tempfile.NamedTemporaryFile(mode="wb", dir=directory, delete=False) as file:
+        for record in records:
+            file.write(RUN_RECORD.pack(*record))
+    return file.name
+
+
+def yield_run_records(filename: str) -> typing.Iterator[tuple[int, int]]:
+    with open(file=filename, mode="rb") as read_file:
+        while block := read_file.read(RUN_RECORD.size * RUN_READ_RECORDS):
+            yield from RUN_RECORD.iter_unpack(block)
+
+
+def external_total_winnings(
+    filename: str, jokers: bool = False, run_size: int = 1_000_000
+) -> int:
+    records = yield_hand_records(yield_data(filename), jokers)
+    with tempfile.TemporaryDirectory() as directory:
+        run_filenames: list[str] = []
+        while run := list(itertools.islice(records, run_size)):
+            run_filenames.append(write_run(run, directory))
+        merged = heapq.merge(
+            *(yield_run_records(run_filename) for run_filename in run_filenames),
+            key=operator.itemgetter(0),
+        )
+        return sum(rank * bid for rank, (_, bid) in enumerate(merged, 1))
+
+
+def total_winnings(hands: list[Hand]) -> int:
+    hands.sort(key=operator.attrgetter("key"))
+    return sum(rank * hand.bid for rank, hand in enumerate(hands, 1))
+
+
+def radix_rank_order(keys: list[int]) -> list[int]:
+    order = list(range(len(keys)))
+    for shift in range(0, HAND_KEY_BITS, RADIX_BITS):
+        buckets: list[list[int]] = [[] for _ in range(RADIX_MASK + 1)]
+        appends = [bucket.append for bucket in buckets]
+        for index in order:
+            appends[keys[index] >> shift & RADIX_MASK](index)
+        order = list(itertools.chain.from_iterable(buckets))
+    return order
+
+
+def radix_total_winnings(keys: list[int], bids: list[int]) -> int:
+    order = radix_rank_order(keys)
+    return sum(rank * bids[index] for rank, index in enumerate(order, 1))
+
+
+def benchmark_ranking(hand_count: int = 10_000_000) -> None:
+    keys = [
+        random.randint(1, 7) << CARD_KEY_BITS * 5 | random.getrandbits(20)
+        for _ in range(hand_count)
+    ]
+    bids = [random.randint(1, 1000) for _ in range(hand_count)]
+
+    start = time.perf_counter()
+    radix_result = radix_total_winnings(keys, bids)
+    radix_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    order = sorted(range(hand_count), key=keys.__getitem__)
+    sorted_result = sum(rank * bids[index] for rank, index in enumerate(order, 1))
+    sorted_time = time.perf_counter() - start
+
+    assert radix_result == sorted_result
+    print(f"{hand_count} hands radix: {radix_time:.2f}s sorted: {sorted_time:.2f}s")
+
+
 def part_one() -> int:
     data = yield_data(FILENAME)
     hands = create_hands(data)
-    hand_type_collection = HandTypeCollection()
-    for hand in hands:
-        hand_type_collection.add_hand(hand)
-    hand_type_collection.sort_collections()
-    rank = 1
-    total_winning = 0
-
-    for hand in itertools.chain(
-        hand_type_collection.high_card,
-        hand_type_collection.one_pair,
-        hand_type_collection.two_pair,
-        hand_type_collection.three_of_a_kind,
-        hand_type_collection.full_house,
-        hand_type_collection.four_of_a_kind,
-        hand_type_collection.five_of_a_kind,
-    ):
-        total_winning += hand.bid * rank
-        rank += 1
-
-    return total_winning
+    return total_winnings(hands)
 
 
 def part_two() -> int:
     data = yield_data(FILENAME)
     hands = create_hands(data, True)
-    hand_type_collection = HandTypeCollection()
-    for hand in hands:
-        hand_type_collection.add_hand(hand)
-    hand_type_collection.sort_collections()
-    rank = 1
-    total_winning = 0
-
-    for hand in itertools.chain(
-        hand_type_collection.high_card,
-        hand_type_collection.one_pair,
-        hand_type_collection.two_pair,
-        hand_type_collection.three_of_a_kind,
-        hand_type_collection.full_house,
-        hand_type_collection.four_of_a_kind,
-        hand_type_collection.five_of_a_kind,
-    ):
-        total_winning += hand.bid * rank
-        rank += 1
-
-    return total_winning
+    return total_winnings(hands)
 
 
 def main():
@@ -1,7 +1,9 @@
+import concurrent.futures
 import dataclasses
 import enum
 import itertools
 import math
+import time
 import typing
 
 TEST_FILENAME = "day8_testdata.txt"
@@ -33,51 +35,284 @@ class Node:
         return {Direction.LEFT: self.left, Direction.RIGHT: self.right}[direction]
 
 
+direction_to_index = {Direction.LEFT: 0, Direction.RIGHT: 1}
+
+
+@dataclasses.dataclass
+class WalkCycle:
+    offset: int
+    length: int
+    end_steps: list[int]
+    cycle_end_steps: list[int]
+
+    def is_end_step(self, steps: int) -> bool:
+        if steps < self.offset:
+            return steps in self.end_steps
+        return self.offset + (steps - self.offset) % self.length in self.cycle_end_steps
+
+    def yield_end_steps_before(self, limit: int) -> typing.Iterator[int]:
+        yield from (steps for steps in self.end_steps if steps < limit)
+        for cycle_start in range(0, limit, self.length):
+            for steps in self.cycle_end_steps:
+                if steps + cycle_start < limit:
+                    yield steps + cycle_start
+
+
+def combine_congruences(
+    first: tuple[int, int], second: tuple[int, int]
+) -> tuple[int, int] | None:
+    residue, modulus = first
+    other_residue, other_modulus = second
+    divisor = math.gcd(modulus, other_modulus)
+    if (other_residue - residue) % divisor:
+        return None
+    reduced_modulus = other_modulus // divisor
+    multiple = (
+        (other_residue - residue)
+        // divisor
+        * pow(modulus // divisor, -1, reduced_modulus)
+        % reduced_modulus
+    )
+    combined_modulus = modulus * reduced_modulus
+    return (residue + modulus * multiple) % combined_modulus, combined_modulus
+
+
+def first_common_end_step(cycles: list[WalkCycle]) -> int:
+    # every walk is inside its cycle from the largest offset onwards
+    periodic_start = max([1, *(cycle.offset for cycle in cycles)])
+    first, *others = cycles
+    early_steps = [
+        steps
+        for steps in first.yield_end_steps_before(periodic_start)
+        if steps >= 1 and all(other.is_end_step(steps) for other in others)
+    ]
+    if early_steps:
+        return min(early_steps)
+
+    congruences = [(0, 1)]
+    for cycle in cycles:
+        congruences = [
+            combined
+            for congruence in congruences
+            for steps in cycle.cycle_end_steps
+            if (combined := combine_congruences(congruence, (steps, cycle.length)))
+        ]
+    if not congruences:
+        raise ValueError("Walks never reach end nodes at the same step")
+    return min(
+        periodic_start + (residue - periodic_start) % modulus
+        for residue, modulus in congruences
+    )
+
+
+@dataclasses.dataclass
+class CompiledMap:
+    names: list[str]
+    left: list[int]
+    right: list[int]
+    directions: list[int]
+    name_to_id: dict[str, int]
+
+    def node_ids(self, last_letter: str) -> list[int]:
+        return [
+            node_id for node_id, name in enumerate(self.names) if name[2] == last_letter
+        ]
+
+    def walk(self, node_id: int, steps: int) -> int:
+        targets = (self.left, self.right)
+        directions = self.directions
+        length = len(directions)
+        for step in range(steps):
+            node_id = targets[directions[step % length]][node_id]
+        return node_id
+
+    def find_cycle(self, node_id: int, is_end: list[bool]) -> WalkCycle:
+        targets = (self.left, self.right)
+        directions = self.directions
+        length = len(directions)
+        seen: dict[tuple[int, int], int] = {}
+        end_steps: list[int] = []
+        steps = 0
+        while (node_id, steps % length) not in seen:
+            seen[node_id, steps % length] = steps
+            if is_end[node_id]:
+                end_steps.append(steps)
+            node_id = targets[directions[steps % length]][node_id]
+            steps += 1
+        offset = seen[node_id, steps % length]
+        return WalkCycle(
+            offset,
+            steps - offset,
+            [end_step for end_step in end_steps if 0 < end_step < offset],
+            [end_step for end_step in end_steps if end_step >= offset],
+        )
+
+    def steps_to_end(self, node_id: int, is_end: list[bool]) -> int:
+        targets = (self.left, self.right)
+        directions = self.directions
+        length = len(directions)
+        steps = 0
+        while True:
+            node_id = targets[directions[steps % length]][node_id]
+            steps += 1
+            if is_end[node_id]:
+                return steps
+
+
+worker_map: tuple[CompiledMap, list[bool]] | None = None
+
+
+def init_cycle_worker(compiled: CompiledMap, is_end: list[bool]) -> None:
+    global worker_map
+    worker_map = (compiled, is_end)
+
+
+def find_cycle_in_worker(node_id: int) -> WalkCycle:
+    assert worker_map is not None
+    compiled, is_end = worker_map
+    return compiled.find_cycle(node_id, is_end)
+
+
+def find_cycles_in_pool(
+    compiled: CompiledMap,
+    node_ids: list[int],
+    is_end: list[bool],
+    max_workers: int | None = None,
+) -> list[WalkCycle]:
+    # the graph arrays are sent once per worker process, not once per walk
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=init_cycle_worker,
+        initargs=(compiled, is_end),
+    ) as executor:
+        return list(executor.map(find_cycle_in_worker, node_ids))
+
+
+@dataclasses.dataclass
+class JumpTable:
+    compiled: CompiledMap
+    levels: list[list[int]] = dataclasses.field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if not self.levels:
+            length = len(self.compiled.directions)
+            self.levels.append(
+                [
+                    self.compiled.walk(node_id, length)
+                    for node_id in range(len(self.compiled.names))
+                ]
+            )
+
+    def position(self, node_id: int, steps: int) -> int:
+        # levels[n] applies the whole direction string 2 ** n times
+        blocks, remainder = divmod(steps, len(self.compiled.directions))
+        while len(self.levels) < blocks.bit_length():
+            previous = self.levels[-1]
+            self.levels.append([previous[target] for target in previous])
+        level = 0
+        while blocks:
+            if blocks & 1:
+                node_id = self.levels[level][node_id]
+            blocks >>= 1
+            level += 1
+        return self.compiled.walk(node_id, remainder)
+
+    def all_at_end(self, node_ids: list[int], steps: int, is_end: list[bool]) -> bool:
+        return all(is_end[self.position(node_id, steps)] for node_id in node_ids)
+
+
 @dataclasses.dataclass
 class Map:
     directions: tuple[Direction, ...]
     nodes: dict[str, Node] = dataclasses.field(default_factory=dict)
+    _compiled: CompiledMap | None = dataclasses.field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _jump_table: JumpTable | None = dataclasses.field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def add_node(self, node: Node) -> None:
         self.nodes[node.name] = node
+        self._compiled = None
+        self._jump_table = None
+
+    def compile(self) -> CompiledMap:
+        if self._compiled is None:
+            names = list(self.nodes)
+            name_to_id = {name: node_id for node_id, name in enumerate(names)}
+            self._compiled = CompiledMap(
+                names,
+                [name_to_id[node.left] for node in self.nodes.values()],
+                [name_to_id[node.right] for node in self.nodes.values()],
+                [direction_to_index[direction] for direction in self.directions],
+                name_to_id,
+            )
+        return self._compiled
+
+    def jump_table(self) -> JumpTable:
+        if self._jump_table is None:
+            self._jump_table = JumpTable(self.compile())
+        return self._jump_table
+
+    def position_after(self, name: str, steps: int) -> str:
+        compiled = self.compile()
+        node_id = self.jump_table().position(compiled.name_to_id[name], steps)
+        return compiled.names[node_id]
+
+    def end_steps_in(
+        self, names: list[str], candidate_steps: typing.Iterable[int]
+    ) -> typing.Iterator[int]:
+        compiled = self.compile()
+        jump_table = self.jump_table()
+        node_ids = [compiled.name_to_id[name] for name in names]
+        is_end = [name[2] == "Z" for name in compiled.names]
+        for steps in candidate_steps:
+            if jump_table.all_at_end(node_ids, steps, is_end):
+                yield steps
 
     def starting_nodes(self) -> list[Node]:
         return [node for node in self.nodes.values() if node.name[2] == "A"]
 
     def navigate_to_ZZZ(self) -> int:
-        steps = 0
-        current_node = self.nodes["AAA"]
-        for direction in itertools.cycle(self.directions):
-            destination_str = current_node.navigate(direction)
-            destination_node = self.nodes[destination_str]
-            steps += 1
-            if destination_node.name == "ZZZ":
-                break
-            current_node = destination_node
-        return steps
+        compiled = self.compile()
+        is_end = [name == "ZZZ" for name in compiled.names]
+        return compiled.steps_to_end(compiled.name_to_id["AAA"], is_end)
 
-    def navigate_starting_nodes_to_all_ending_Z(self) -> int:
-        steps = 0
-        current_nodes = self.starting_nodes()
-        steps_to_end_node: list[int] = []
-        for direction in itertools.cycle(self.directions):
-            destination_nodes: list[Node] = []
-            if not current_nodes:
-                break
-            steps += 1
-            for current_node in current_nodes:
-                destination_str = current_node.navigate(direction)
-                destination_node = self.nodes[destination_str]
-                if destination_node.name[2] == "Z":
-                    steps_to_end_node.append(steps)
-                else:
-                    destination_nodes.append(destination_node)
-
-            current_nodes = destination_nodes
-            print(" ".join(node.name for node in current_nodes))
-
-        steps = math.lcm(*steps_to_end_node)
-        return steps
+    def navigate_starting_nodes_to_all_ending_Z(self, parallel: bool = False) -> int:
+        compiled = self.compile()
+        is_end = [name[2] == "Z" for name in compiled.names]
+        starting_node_ids = compiled.node_ids("A")
+        if not starting_node_ids:
+            raise ValueError("Map has no starting nodes ending in A")
+        if parallel:
+            cycles = find_cycles_in_pool(compiled, starting_node_ids, is_end)
+        else:
+            cycles = [
+                compiled.find_cycle(node_id, is_end) for node_id in starting_node_ids
+            ]
+        return first_common_end_step(cycles)
+
+
+def benchmark_walk(map: Map, steps: int = 1_000_000) -> None:
+    start_node = next(iter(map.nodes.values()))
+
+    start = time.perf_counter()
+    current_node = start_node
+    for direction in itertools.islice(itertools.cycle(map.directions), steps):
+        current_node = map.nodes[current_node.navigate(direction)]
+    node_time = time.perf_counter() - start
+
+    compiled = map.compile()
+    start = time.perf_counter()
+    node_id = compiled.walk(0, steps)
+    compiled_time = time.perf_counter() - start
+
+    assert compiled.names[node_id] == current_node.name
+    print(
+        f"node walk: {steps / node_time:,.0f} steps/s "
+        f"compiled walk: {steps / compiled_time:,.0f} steps/s"
+    )
 
 
 def create_map(data) -> Map:
@@ -1,7 +1,20 @@
 import collections
 import dataclasses
+import functools
+import itertools
+import math
+import operator
+import random
+import time
 import typing
 
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
 TEST_FILENAME = "day9_testdata.txt"
 FILENAME = "year2023\day9_data.txt"
 
@@ -23,6 +36,36 @@ def yield_pairs(values: collections.deque, backwards: bool = False):
         first = next_
 
 
+@functools.cache
+def extrapolation_coefficients(length: int) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    next_coefficients = tuple(
+        (-1) ** (length - 1 - index) * math.comb(length, index)
+        for index in range(length)
+    )
+    previous_coefficients = tuple(
+        (-1) ** index * math.comb(length, index + 1) for index in range(length)
+    )
+    return next_coefficients, previous_coefficients
+
+
+def extrapolate_values(values: typing.Sequence[int]) -> tuple[int, int]:
+    next_coefficients, previous_coefficients = extrapolation_coefficients(len(values))
+    previous_value = sum(map(operator.mul, previous_coefficients, values))
+    next_value = sum(map(operator.mul, next_coefficients, values))
+    return previous_value, next_value
+
+
+def extrapolate_data(data: typing.Iterator[str]) -> tuple[int, int]:
+    previous_total = next_total = 0
+    for line in data:
+        previous_value, next_value = extrapolate_values(
+            [int(number) for number in line.split(" ")]
+        )
+        previous_total += previous_value
+        next_total += next_value
+    return previous_total, next_total
+
+
 @dataclasses.dataclass
 class Sequence:
     values: collections.deque[int] = dataclasses.field(
@@ -31,6 +74,9 @@ class Sequence:
     values_history: list[collections.deque[int]] = dataclasses.field(
         default_factory=list
     )
+    leading_differences: list[int] | None = dataclasses.field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def create_next_values_history(self, backwards: bool = False) -> None:
         if self.values_history:
@@ -63,6 +109,7 @@ class Sequence:
                 print(f"<create_all_values_history> reached {loops} loops")
 
     def extrapolate_history(self, backwards: bool = False) -> None:
+        self.leading_differences = None
         self.values_history[-1].append(0)
         values_history_length = len(self.values_history) - 1
         for index in range(values_history_length, 0, -1):
@@ -82,6 +129,59 @@ class Sequence:
             new_value = self.values[-1] + first_values_history[-1]
             self.values.append(new_value)
 
+    def extrapolate(self) -> tuple[int, int]:
+        return extrapolate_values(self.values)
+
+    def create_leading_differences(self) -> list[int]:
+        leading_differences: list[int] = []
+        values = list(self.values)
+        while any(values):
+            leading_differences.append(values[0])
+            values = [second - first for first, second in itertools.pairwise(values)]
+        return leading_differences
+
+    def predict(self, steps: int) -> int:
+        # positive steps count on from the last value, negative back from the first
+        if self.leading_differences is None:
+            self.leading_differences = self.create_leading_differences()
+        position = len(self.values) - 1 + steps if steps >= 0 else steps
+        prediction = 0
+        coefficient = 1
+        for order, difference in enumerate(self.leading_differences):
+            if order:
+                coefficient = coefficient * (position - order + 1) // order
+            prediction += coefficient * difference
+        return prediction
+
+
+def benchmark_extrapolation(sequence_count: int = 10_000, length: int = 21) -> None:
+    sequences = [
+        Sequence(collections.deque(random.randint(-1000, 1000) for _ in range(length)))
+        for _ in range(sequence_count)
+    ]
+
+    start = time.perf_counter()
+    binomial_results = [sequence.extrapolate() for sequence in sequences]
+    binomial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    history_results: list[tuple[int, int]] = []
+    for sequence in sequences:
+        sequence.create_all_values_history()
+        sequence.extrapolate_history()
+        backwards_sequence = Sequence(collections.deque(sequence.values))
+        backwards_sequence.values.pop()
+        backwards_sequence.create_all_values_history(True)
+        backwards_sequence.extrapolate_history(True)
+        history_results.append((backwards_sequence.values[0], sequence.values[-1]))
+    history_time = time.perf_counter() - start
+
+    assert binomial_results == history_results
+    print(
+        f"{sequence_count} sequences binomial: {binomial_time:.2f}s "
+        f"history: {history_time:.2f}s"
+    )
+
 
 def create_sequences(data: typing.Iterator) -> list[Sequence]:
     sequences: list[Sequence] = []
@@ -91,29 +191,59 @@ def create_sequences(data: typing.Iterator) -> list[Sequence]:
     return sequences
 
 
+def create_sequence_arrays(data: typing.Iterator) -> dict[int, "np.ndarray"]:
+    if not HAS_NUMPY:
+        raise ImportError("numpy is required for array sequences")
+    rows_by_length: dict[int, list[list[int]]] = collections.defaultdict(list)
+    for line in data:
+        values = [int(number) for number in line.split(" ")]
+        rows_by_length[len(values)].append(values)
+
+    arrays: dict[int, np.ndarray] = {}
+    for length, rows in rows_by_length.items():
+        largest = max(abs(value) for row in rows for value in row)
+        # each difference level can double the largest value, object keeps exact ints
+        if largest * 2**length < 2**63:
+            arrays[length] = np.array(rows, dtype=np.int64)
+        else:
+            arrays[length] = np.array(rows, dtype=object)
+    return arrays
+
+
+def extrapolate_sequence_array(values: "np.ndarray") -> tuple[int, int]:
+    previous_values = np.zeros(values.shape[0], dtype=values.dtype)
+    next_values = np.zeros(values.shape[0], dtype=values.dtype)
+    sign = 1
+    while values.shape[1] and values.any():
+        previous_values += sign * values[:, 0]
+        next_values += values[:, -1]
+        sign = -sign
+        values = np.diff(values, axis=1)
+    return sum(previous_values.tolist()), sum(next_values.tolist())
+
+
+def extrapolate_sequence_arrays(arrays: dict[int, "np.ndarray"]) -> tuple[int, int]:
+    previous_total = next_total = 0
+    for values in arrays.values():
+        previous_sum, next_sum = extrapolate_sequence_array(values)
+        previous_total += previous_sum
+        next_total += next_sum
+    return previous_total, next_total
+
+
 def part_one(sequences: list[Sequence]) -> int:
-    total = 0
-    for sequence in sequences:
-        sequence.create_all_values_history()
-        sequence.extrapolate_history()
-        total += sequence.values[-1]
-    return total
+    return sum(sequence.extrapolate()[1] for sequence in sequences)
 
 
 def part_two(sequences: list[Sequence]) -> int:
-    total = 0
-    for sequence in sequences:
-        sequence.create_all_values_history(True)
-        sequence.extrapolate_history(True)
-        total += sequence.values[0]
-    return total
+    return sum(sequence.extrapolate()[0] for sequence in sequences)
 
 
 def main():
     data = yield_data(FILENAME)
-    sequences = create_sequences(data)
-    print(f"Part one: {part_one(sequences)}")
-    print(f"Part two: {part_two(sequences)}")
+    previous_total, next_total = extrapolate_data(data)
+    print(f"Part one: {next_total}")
+    print(f"Part two: {previous_total}")
 
 
 if __name__ == "__main__":
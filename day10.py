@@ -1,6 +1,9 @@
+import concurrent.futures
 import dataclasses
 import enum
+import itertools
 import typing
+from multiprocessing import shared_memory
 
 TEST_FILENAME = "day10_testdata.txt"
 FILENAME = "day10_data.txt"
@@ -72,6 +75,189 @@ PIPE_LOCATION_DIRECTIONS: dict[LocationType, tuple[LocationDirection, ...]] = {
 }
 
 
+DIRECTION_CODES = {
+    LocationDirection.UP: 0,
+    LocationDirection.RIGHT: 1,
+    LocationDirection.DOWN: 2,
+    LocationDirection.LEFT: 3,
+}
+NO_EXIT = 255
+
+PIPE_EXIT_CODES: dict[LocationType, tuple[int, ...]] = {
+    location_type: tuple(DIRECTION_CODES[direction] for direction in directions)
+    for location_type, directions in PIPE_LOCATION_DIRECTIONS.items()
+}
+
+
+def create_pipe_turns() -> bytes:
+    # index pipe byte * 4 + direction moved into the pipe, value is direction out
+    pipe_turns = bytearray([NO_EXIT] * 256 * 4)
+    for location_type, (first, second) in PIPE_EXIT_CODES.items():
+        pipe = ord(location_type.value)
+        pipe_turns[pipe * 4 + (first + 2) % 4] = second
+        pipe_turns[pipe * 4 + (second + 2) % 4] = first
+    return bytes(pipe_turns)
+
+
+PIPE_TURNS = create_pipe_turns()
+UP_EXIT_PIPES = frozenset(
+    ord(location_type.value)
+    for location_type, location_directions in PIPE_LOCATION_DIRECTIONS.items()
+    if LocationDirection.UP in location_directions
+)
+
+
+ByteBuffer = bytes | bytearray | memoryview
+
+
+def count_enclosed_rows(
+    cells: ByteBuffer,
+    loop: ByteBuffer,
+    width: int,
+    first_row: int,
+    last_row: int,
+) -> int:
+    total = 0
+    for y in range(first_row, last_row):
+        inside_loop = False
+        for position in range(y * width, (y + 1) * width):
+            if loop[position]:
+                if cells[position] in UP_EXIT_PIPES:
+                    inside_loop = not inside_loop
+            elif inside_loop:
+                total += 1
+    return total
+
+
+def shared_memory_buffer(memory: shared_memory.SharedMemory) -> memoryview:
+    if memory.buf is None:
+        raise ValueError(f"Shared memory {memory.name} is closed")
+    return memory.buf
+
+
+def count_enclosed_rows_in_shared_memory(
+    cells_name: str, loop_name: str, width: int, first_row: int, last_row: int
+) -> int:
+    cells_memory = shared_memory.SharedMemory(name=cells_name)
+    loop_memory = shared_memory.SharedMemory(name=loop_name)
+    try:
+        return count_enclosed_rows(
+            shared_memory_buffer(cells_memory),
+            shared_memory_buffer(loop_memory),
+            width,
+            first_row,
+            last_row,
+        )
+    finally:
+        cells_memory.close()
+        loop_memory.close()
+
+
+@dataclasses.dataclass
+class CompactPipeMaze:
+    width: int
+    height: int
+    cells: bytearray
+    start: int
+    loop: bytearray = dataclasses.field(default_factory=bytearray)
+    loop_length: int = 0
+    loop_vertices: list[int] = dataclasses.field(default_factory=list)
+
+    def direction_offsets(self) -> tuple[int, int, int, int]:
+        return -self.width, 1, self.width, -1
+
+    def neighbour(self, position: int, direction: int) -> int | None:
+        y, x = divmod(position, self.width)
+        match direction:
+            case 0 if y > 0:
+                return position - self.width
+            case 1 if x < self.width - 1:
+                return position + 1
+            case 2 if y < self.height - 1:
+                return position + self.width
+            case 3 if x > 0:
+                return position - 1
+        return None
+
+    def starting_directions(self) -> list[int]:
+        directions: list[int] = []
+        for direction in range(4):
+            neighbour = self.neighbour(self.start, direction)
+            if neighbour is None:
+                continue
+            if PIPE_TURNS[self.cells[neighbour] * 4 + direction] != NO_EXIT:
+                directions.append(direction)
+
+        for location_type, exit_codes in PIPE_EXIT_CODES.items():
+            if set(exit_codes) == set(directions):
+                self.cells[self.start] = ord(location_type.value)
+        return directions
+
+    def find_loop_steps(self) -> int:
+        cells = self.cells
+        offsets = self.direction_offsets()
+        loop = self.loop = bytearray(len(cells))
+        vertices = self.loop_vertices = []
+        start = position = self.start
+        starting_direction = direction = self.starting_directions()[0]
+        length = 0
+        while True:
+            position += offsets[direction]
+            loop[position] = 1
+            length += 1
+            if position == start:
+                break
+            next_direction = PIPE_TURNS[cells[position] * 4 + direction]
+            if next_direction != direction:
+                vertices.append(position)
+            direction = next_direction
+        if direction != starting_direction:
+            vertices.append(start)
+        self.loop_length = length
+        return length // 2
+
+    def enclosed_area_count(self) -> int:
+        # shoelace area of the loop corners, then Pick's theorem for interior tiles
+        twice_area = 0
+        closed_vertices = [*self.loop_vertices, self.loop_vertices[0]]
+        for first, second in itertools.pairwise(closed_vertices):
+            first_y, first_x = divmod(first, self.width)
+            second_y, second_x = divmod(second, self.width)
+            twice_area += first_x * second_y - second_x * first_y
+        return (abs(twice_area) - self.loop_length) // 2 + 1
+
+    def enclosed_count(self) -> int:
+        return count_enclosed_rows(self.cells, self.loop, self.width, 0, self.height)
+
+    def parallel_enclosed_count(
+        self, band_rows: int = 256, max_workers: int | None = None
+    ) -> int:
+        # workers attach to shared copies of the pipe and loop bytes by name
+        cells_memory = shared_memory.SharedMemory(create=True, size=len(self.cells))
+        loop_memory = shared_memory.SharedMemory(create=True, size=len(self.loop))
+        try:
+            shared_memory_buffer(cells_memory)[: len(self.cells)] = self.cells
+            shared_memory_buffer(loop_memory)[: len(self.loop)] = self.loop
+            with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+                futures = [
+                    executor.submit(
+                        count_enclosed_rows_in_shared_memory,
+                        cells_memory.name,
+                        loop_memory.name,
+                        self.width,
+                        first_row,
+                        min(first_row + band_rows, self.height),
+                    )
+                    for first_row in range(0, self.height, band_rows)
+                ]
+                return sum(future.result() for future in futures)
+        finally:
+            cells_memory.close()
+            cells_memory.unlink()
+            loop_memory.close()
+            loop_memory.unlink()
+
+
 @dataclasses.dataclass
 class GridLocation:
     location: Location
@@ -294,6 +480,32 @@ def create_pipe_maze(data: typing.Iterator[str]) -> PipeMaze:
     return pipe_maze
 
 
+def create_compact_pipe_maze(data: typing.Iterator[str]) -> CompactPipeMaze:
+    cells = bytearray()
+    height = 0
+    for line in data:
+        cells += line.encode()
+        height += 1
+    width = len(cells) // height
+    start = cells.index(ord(LocationType.STARTING_POSITION.value))
+    return CompactPipeMaze(width, height, cells, start)
+
+
+def solve_maze_file(filename: str) -> tuple[str, int, int]:
+    pipe_maze = create_compact_pipe_maze(yield_data(filename))
+    farthest_steps = pipe_maze.find_loop_steps()
+    return filename, farthest_steps, pipe_maze.enclosed_area_count()
+
+
+def yield_maze_file_results(
+    filenames: typing.Iterable[str], max_workers: int | None = None
+) -> typing.Iterator[tuple[str, int, int]]:
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+        futures = [executor.submit(solve_maze_file, filename) for filename in filenames]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
 def part_one(pipe_maze: PipeMaze) -> int:
     steps = pipe_maze.find_loop_steps()
     return steps
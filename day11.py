@@ -1,6 +1,5 @@
 import dataclasses
 import enum
-import itertools
 import typing
 
 TEST_FILENAME = "day11_testdata.txt"
@@ -62,6 +61,39 @@ class GridLocation:
                 raise ValueError(f"Invalid type: {self.value}")
 
 
+def empty_before_counts(occupied: set[int], size: int) -> list[int]:
+    counts: list[int] = []
+    empty_count = 0
+    for index in range(size):
+        counts.append(empty_count)
+        if index not in occupied:
+            empty_count += 1
+    return counts
+
+
+def axis_distance_components(
+    values: list[int], empty_before: list[int]
+) -> tuple[int, int]:
+    # empty_before never decreases, so sorting by value sorts both axes
+    total = crossings = 0
+    prefix_total = prefix_crossings = 0
+    for index, value in enumerate(sorted(values)):
+        empty_count = empty_before[value]
+        total += value * index - prefix_total
+        crossings += empty_count * index - prefix_crossings
+        prefix_total += value
+        prefix_crossings += empty_count
+    return total, crossings
+
+
+def expansion_distance_sums(
+    components: tuple[int, int], factors: typing.Iterable[int]
+) -> list[int]:
+    # each empty line crossed becomes factor lines, adding factor - 1
+    base, crossings = components
+    return [base + (factor - 1) * crossings for factor in factors]
+
+
 @dataclasses.dataclass
 class Image:
     galaxy_locations: list[Location] = dataclasses.field(default_factory=list)
@@ -122,15 +154,41 @@ class Image:
         return None
 
     def expand_galaxy(self, amount: int = 1) -> None:
-        empty_rows = self.find_empty_rows()
-        empty_columns = self.find_empty_columns()
-        for row in reversed(empty_rows):
-            self.insert_empty_row(row, amount)
-        for column in reversed(empty_columns):
-            self.insert_empty_column(column, amount)
+        empty_columns_before = empty_before_counts(
+            {location.x for location in self.galaxy_locations}, self.max_x_location + 1
+        )
+        empty_rows_before = empty_before_counts(
+            {location.y for location in self.galaxy_locations}, self.max_y_location + 1
+        )
+        self.max_x_location += amount * len(self.find_empty_columns())
+        self.max_y_location += amount * len(self.find_empty_rows())
+        for location in self.galaxy_locations:
+            location.x += amount * empty_columns_before[location.x]
+            location.y += amount * empty_rows_before[location.y]
 
         return None
 
+    def distance_components(self) -> tuple[int, int]:
+        empty_columns_before = empty_before_counts(
+            {location.x for location in self.galaxy_locations}, self.max_x_location + 1
+        )
+        empty_rows_before = empty_before_counts(
+            {location.y for location in self.galaxy_locations}, self.max_y_location + 1
+        )
+        x_total, x_crossings = axis_distance_components(
+            [location.x for location in self.galaxy_locations], empty_columns_before
+        )
+        y_total, y_crossings = axis_distance_components(
+            [location.y for location in self.galaxy_locations], empty_rows_before
+        )
+        return x_total + y_total, x_crossings + y_crossings
+
+    def distance_sum(self, factor: int = 2) -> int:
+        return expansion_distance_sums(self.distance_components(), (factor,))[0]
+
+    def distance_sums(self, factors: typing.Iterable[int]) -> list[int]:
+        return expansion_distance_sums(self.distance_components(), factors)
+
     def location_in_grid(self, location: Location) -> bool:
         return all(
             (
@@ -153,6 +211,58 @@ class Image:
         return "\n".join(rows)
 
 
+def histogram_distance_components(counts: list[int]) -> tuple[int, int]:
+    total = crossings = 0
+    galaxies = prefix_total = prefix_crossings = 0
+    empty_count = 0
+    for index, count in enumerate(counts):
+        if not count:
+            empty_count += 1
+            continue
+        total += count * (index * galaxies - prefix_total)
+        crossings += count * (empty_count * galaxies - prefix_crossings)
+        galaxies += count
+        prefix_total += count * index
+        prefix_crossings += count * empty_count
+    return total, crossings
+
+
+@dataclasses.dataclass
+class GalaxyHistogram:
+    row_counts: list[int] = dataclasses.field(default_factory=list)
+    column_counts: list[int] = dataclasses.field(default_factory=list)
+
+    def add_row(self, line: str) -> None:
+        self.row_counts.append(line.count(LocationType.GALAXY.value))
+        if len(self.column_counts) < len(line):
+            self.column_counts.extend([0] * (len(line) - len(self.column_counts)))
+        for x_index, character in enumerate(line):
+            if character == LocationType.GALAXY.value:
+                self.column_counts[x_index] += 1
+
+        return None
+
+    def distance_components(self) -> tuple[int, int]:
+        row_total, row_crossings = histogram_distance_components(self.row_counts)
+        column_total, column_crossings = histogram_distance_components(
+            self.column_counts
+        )
+        return row_total + column_total, row_crossings + column_crossings
+
+    def distance_sum(self, factor: int = 2) -> int:
+        return expansion_distance_sums(self.distance_components(), (factor,))[0]
+
+    def distance_sums(self, factors: typing.Iterable[int]) -> list[int]:
+        return expansion_distance_sums(self.distance_components(), factors)
+
+
+def create_galaxy_histogram(data: typing.Iterator[str]) -> GalaxyHistogram:
+    galaxy_histogram = GalaxyHistogram()
+    for line in data:
+        galaxy_histogram.add_row(line)
+    return galaxy_histogram
+
+
 def create_image(data: typing.Iterator[str]) -> Image:
     image = Image()
     for y_index, line in enumerate(data):
@@ -163,31 +273,19 @@ def create_image(data: typing.Iterator[str]) -> Image:
     return image
 
 
-def part_one() -> int:
-    data = yield_data(FILENAME)
-    image = create_image(data)
-    total = 0
-    image.expand_galaxy()
-    for galaxy1, galaxy2 in itertools.combinations(image.galaxy_locations, 2):
-        distance_between = galaxy1.distance_between(galaxy2)
-        total += distance_between
-    return total
+def part_one(image: Image) -> int:
+    return image.distance_sum()
 
 
-def part_two() -> int:
-    data = yield_data(FILENAME)
-    image = create_image(data)
-    total = 0
-    image.expand_galaxy(999999)
-    for galaxy1, galaxy2 in itertools.combinations(image.galaxy_locations, 2):
-        distance_between = galaxy1.distance_between(galaxy2)
-        total += distance_between
-    return total
+def part_two(image: Image) -> int:
+    return image.distance_sum(1_000_000)
 
 
 def main():
-    print(f"Part one: {part_one()}")
-    print(f"Part two: {part_two()}")
+    data = yield_data(FILENAME)
+    image = create_image(data)
+    print(f"Part one: {part_one(image)}")
+    print(f"Part two: {part_two(image)}")
 
 
 if __name__ == "__main__":
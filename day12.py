@@ -1,5 +1,6 @@
+import concurrent.futures
 import dataclasses
-import itertools
+import os
 import typing
 import collections
 
@@ -25,17 +26,110 @@ class ConditionRecord:
     contiguous_groups: list[int] = dataclasses.field(default_factory=list)
 
     def possible_arrangements(self) -> list[str]:
-        arrangements: list[str] = []
-        counter = collections.Counter(self.springs)
-        amount = counter[UNKNOWN]
-        for values in itertools.product(("#", "."), repeat=amount):
-            springs_copy = self.springs
-            for value in values:
-                springs_copy = springs_copy.replace("?", value, 1)
-            if springs_match_contiguous_groups(springs_copy, self.contiguous_groups):
-                arrangements.append(springs_copy)
+        return list(self.yield_arrangements())
 
-        return arrangements
+    def yield_arrangements(self) -> typing.Iterator[str]:
+        return yield_spring_arrangements(self.springs, self.contiguous_groups)
+
+    def count_arrangements(self, cache: "ArrangementCache | None" = None) -> int:
+        if cache is not None:
+            return count_cached_arrangements(
+                self.springs, tuple(self.contiguous_groups), cache
+            )
+        return count_spring_arrangements(self.springs, self.contiguous_groups)
+
+    def unfold(self, copies: int = 5) -> "ConditionRecord":
+        return ConditionRecord(
+            UNKNOWN.join([self.springs] * copies), self.contiguous_groups * copies
+        )
+
+
+def yield_spring_arrangements(
+    springs: str,
+    contiguous_groups: list[int],
+    position: int = 0,
+    group_index: int = 0,
+    run_length: int = 0,
+    prefix: str = "",
+) -> typing.Iterator[str]:
+    if position == len(springs):
+        if is_complete(contiguous_groups, group_index, run_length):
+            yield prefix
+        return
+    spring = springs[position]
+    if spring != OPERATIONAL and can_extend_run(
+        contiguous_groups, group_index, run_length
+    ):
+        yield from yield_spring_arrangements(
+            springs,
+            contiguous_groups,
+            position + 1,
+            group_index,
+            run_length + 1,
+            f"{prefix}{BROKEN}",
+        )
+    if spring != BROKEN:
+        if run_length == 0:
+            yield from yield_spring_arrangements(
+                springs,
+                contiguous_groups,
+                position + 1,
+                group_index,
+                0,
+                f"{prefix}{OPERATIONAL}",
+            )
+        elif run_length == contiguous_groups[group_index]:
+            yield from yield_spring_arrangements(
+                springs,
+                contiguous_groups,
+                position + 1,
+                group_index + 1,
+                0,
+                f"{prefix}{OPERATIONAL}",
+            )
+
+
+def can_extend_run(
+    contiguous_groups: list[int], group_index: int, run_length: int
+) -> bool:
+    return (
+        group_index < len(contiguous_groups)
+        and run_length < contiguous_groups[group_index]
+    )
+
+
+def is_complete(
+    contiguous_groups: list[int], group_index: int, run_length: int
+) -> bool:
+    if run_length == 0:
+        return group_index == len(contiguous_groups)
+    return (
+        group_index == len(contiguous_groups) - 1
+        and run_length == contiguous_groups[group_index]
+    )
+
+
+def count_spring_arrangements(springs: str, contiguous_groups: list[int]) -> int:
+    # counts keyed by (group index, current run length), one step per spring
+    states: dict[tuple[int, int], int] = {(0, 0): 1}
+    for spring in springs:
+        next_states: collections.Counter[tuple[int, int]] = collections.Counter()
+        for (group_index, run_length), count in states.items():
+            if spring != OPERATIONAL and can_extend_run(
+                contiguous_groups, group_index, run_length
+            ):
+                next_states[group_index, run_length + 1] += count
+            if spring != BROKEN:
+                if run_length == 0:
+                    next_states[group_index, 0] += count
+                elif run_length == contiguous_groups[group_index]:
+                    next_states[group_index + 1, 0] += count
+        states = next_states
+    return sum(
+        count
+        for (group_index, run_length), count in states.items()
+        if is_complete(contiguous_groups, group_index, run_length)
+    )
 
 
 def springs_match_contiguous_groups(springs: str, contiguous_groups: list[int]) -> bool:
@@ -56,6 +150,135 @@ def springs_match_contiguous_groups(springs: str, contiguous_groups: list[int])
     return test_group == contiguous_groups
 
 
+ArrangementKey = tuple[str, tuple[int, ...]]
+
+
+@dataclasses.dataclass
+class ArrangementCache:
+    max_size: int = 1_000_000
+    entries: collections.OrderedDict[ArrangementKey, int] = dataclasses.field(
+        default_factory=collections.OrderedDict
+    )
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def get(self, key: ArrangementKey) -> int | None:
+        count = self.entries.get(key)
+        if count is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return count
+
+    def put(self, key: ArrangementKey, count: int) -> None:
+        self.entries[key] = count
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+        return None
+
+    def __str__(self) -> str:
+        return (
+            f"entries: {len(self.entries)} hits: {self.hits} "
+            f"misses: {self.misses} evictions: {self.evictions}"
+        )
+
+
+def arrangement_key(springs: str, contiguous_groups: tuple[int, ...]) -> ArrangementKey:
+    # leading operational springs never change the count, so drop them from the key
+    return springs.lstrip(OPERATIONAL), contiguous_groups
+
+
+def trivial_arrangement_count(key: ArrangementKey) -> int | None:
+    springs, contiguous_groups = key
+    if not contiguous_groups:
+        return 0 if BROKEN in springs else 1
+    if len(springs) < sum(contiguous_groups) + len(contiguous_groups) - 1:
+        return 0
+    return None
+
+
+def arrangement_sub_keys(key: ArrangementKey) -> list[ArrangementKey]:
+    springs, contiguous_groups = key
+    sub_keys: list[ArrangementKey] = []
+    if springs[0] == UNKNOWN:
+        sub_keys.append(arrangement_key(springs[1:], contiguous_groups))
+    group = contiguous_groups[0]
+    if OPERATIONAL not in springs[:group] and springs[group : group + 1] != BROKEN:
+        sub_keys.append(arrangement_key(springs[group + 1 :], contiguous_groups[1:]))
+    return sub_keys
+
+
+def count_cached_arrangements(
+    springs: str, contiguous_groups: tuple[int, ...], cache: ArrangementCache
+) -> int:
+    # explicit stack, so long records are not limited by the recursion limit
+    root_key = arrangement_key(springs, contiguous_groups)
+    solved: dict[ArrangementKey, int] = {}
+    expanded: set[ArrangementKey] = set()
+    stack = [root_key]
+    while stack:
+        key = stack[-1]
+        if key in solved:
+            stack.pop()
+            continue
+        count = trivial_arrangement_count(key)
+        if count is None and key not in expanded:
+            count = cache.get(key)
+            if count is None:
+                expanded.add(key)
+                stack.extend(
+                    sub_key
+                    for sub_key in arrangement_sub_keys(key)
+                    if sub_key not in solved
+                )
+                continue
+        elif count is None:
+            count = sum(solved[sub_key] for sub_key in arrangement_sub_keys(key))
+            cache.put(key, count)
+        solved[key] = count
+        stack.pop()
+    return solved[root_key]
+
+
+def count_chunk_arrangements(condition_records: list[ConditionRecord]) -> int:
+    return sum(record.count_arrangements() for record in condition_records)
+
+
+def parallel_count_arrangements(
+    condition_records: list[ConditionRecord],
+    max_workers: int | None = None,
+    chunks_per_worker: int = 16,
+    show_progress: bool = False,
+) -> int:
+    workers = max_workers or os.cpu_count() or 1
+    # deal records out costliest first so every chunk gets a similar mix
+    ordered_records = sorted(
+        condition_records,
+        key=lambda record: len(record.springs) * len(record.contiguous_groups),
+        reverse=True,
+    )
+    chunk_count = min(len(ordered_records), workers * chunks_per_worker)
+    chunks = [ordered_records[index::chunk_count] for index in range(chunk_count)]
+    total = 0
+    counted = 0
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        futures = {
+            executor.submit(count_chunk_arrangements, chunk): len(chunk)
+            for chunk in chunks
+        }
+        for future in concurrent.futures.as_completed(futures):
+            total += future.result()
+            counted += futures[future]
+            if show_progress:
+                print(f"Counted {counted}/{len(ordered_records)} records")
+    return total
+
+
 def create_condition_records(data: typing.Iterator) -> list[ConditionRecord]:
     condition_records: list[ConditionRecord] = []
     for line in data:
@@ -70,20 +293,21 @@ def create_condition_records(data: typing.Iterator) -> list[ConditionRecord]:
 def part_one() -> int:
     data = yield_data(FILENAME)
     condition_records = create_condition_records(data)
-    total = 0
-    for record in condition_records:
-        arrangments = record.possible_arrangements()
-        total += len(arrangments)
-    return total
+    return sum(record.count_arrangements() for record in condition_records)
 
 
 def part_two() -> int:
-    return 0
+    data = yield_data(FILENAME)
+    condition_records = create_condition_records(data)
+    cache = ArrangementCache()
+    return sum(
+        record.unfold().count_arrangements(cache) for record in condition_records
+    )
 
 
 def main():
     print(f"Part one: {part_one()}")
-    # print(f"Part two: {part_two()}")
+    print(f"Part two: {part_two()}")
 
 
 if __name__ == "__main__":